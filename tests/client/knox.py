@@ -5,10 +5,11 @@ from enum import Enum
 from typing import Literal
 from uuid import UUID
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, ValidationError
 from ulid import ULID
 
 import httpx
+import orjson
 
 logger = logging.getLogger(__name__)
 
@@ -141,10 +142,35 @@ class TransactionDataWithLineItems(TransactionData, TransactionLineItems): ...
 class Transaction(TransactionReferenceFields, TransactionDataWithLineItems): ...
 
 
+class KnoxEnvelope(BaseModel):
+    data: Transaction
+
+
+class PutTransactionResult(BaseModel):
+    transaction_id: str
+
+
+class PutTransactionEnvelope(BaseModel):
+    data: PutTransactionResult
+
+
+class SearchResponse(BaseModel):
+    data: list[Transaction] | None = None
+
+
+class KnoxError(BaseModel):
+    message: str | None = None
+    code: str | int | None = None
+
+
+class KnoxErrorEnvelope(BaseModel):
+    error: KnoxError = KnoxError()
+
+
 class KnoxClientError(Exception):
     """Exception raised when an error occurs while interacting with the Knox service."""
 
-    def __init__(self, message: str, status_code: int, error_code: str | None):
+    def __init__(self, message: str, status_code: int, error_code: str | int | None):
         self.message = message
         self.status_code = status_code
         self.error_code = error_code
@@ -162,10 +188,18 @@ class KnoxClient:
         timeout: float = 30.0,
         max_retries: int = 3,
         headers: dict[str, str] | None = None,
+        keepalive_expiry: float = 30.0,
+        validate_responses: bool = False,
     ):
         self.base_url = base_url.rstrip("/")
         self.timeout = timeout
         self.max_retries = max_retries
+        self.validate_responses = validate_responses
+        self.limits = httpx.Limits(
+            max_keepalive_connections=20,
+            max_connections=100,
+            keepalive_expiry=keepalive_expiry,
+        )
         self.headers = headers or {}
         self.headers["Authorization"] = f"Bearer {api_key}"
 
@@ -173,26 +207,36 @@ class KnoxClient:
             base_url=self.base_url,
             timeout=self.timeout,
             headers=self.headers,
-            transport=httpx.AsyncHTTPTransport(retries=self.max_retries),
+            transport=httpx.AsyncHTTPTransport(retries=self.max_retries, limits=self.limits, http2=True),
         )
 
     async def put_transaction(
         self, transaction: TransactionDataWithLineItems, headers: dict[str, str] | None = None
-    ) -> Transaction:
+    ) -> Transaction | PutTransactionResult:
         version_id = transaction.transaction_metadata.standard_template_records_id
         response = await self._make_request(
             "PUT",
             "/v1/transactions",
-            json=transaction.model_dump(mode="json"),
-            headers=headers,
+            content=transaction.model_dump_json(),
+            headers={**(headers or {}), "Content-Type": "application/json"},
             params={"version": transaction.version or version_id},
         )
-        json_data = response.json()
-        return Transaction(**json_data["data"])
+        if self.validate_responses:
+            return KnoxEnvelope.model_validate_json(response.content).data
+        return PutTransactionEnvelope.model_validate_json(response.content).data
+
+    async def search_transactions(self, payload: dict[str, Any]) -> SearchResponse:
+        return await self.search_transactions_raw(orjson.dumps(payload))
 
-    async def search_transactions(self, payload: dict[str, Any]) -> dict[str, Any]:
-        response = await self._make_request("POST", "/v1/transactions/search", json=payload)
-        return response.json()
+    async def search_transactions_raw(self, body: bytes) -> SearchResponse:
+        """Search transactions with a pre-encoded JSON body, e.g. one reused across polls."""
+        response = await self._make_request(
+            "POST",
+            "/v1/transactions/search",
+            content=body,
+            headers={"Content-Type": "application/json"},
+        )
+        return SearchResponse.model_validate_json(response.content)
     
     async def health(self) -> dict[str, Any]:
         response = await self._make_request("GET", "/v1/health")
@@ -207,12 +251,15 @@ class KnoxClient:
             response.raise_for_status()
             return response
         except httpx.HTTPStatusError as e:
-            json_data = e.response.json()
-            error = json_data.get("error", {})
+            try:
+                error = KnoxErrorEnvelope.model_validate_json(e.response.content).error
+            except ValidationError:
+                # Not a Knox error envelope (e.g. an HTML page from a proxy); keep the start of the raw body.
+                error = KnoxError(message=e.response.text[:200] or None)
             raise KnoxClientError(
-                message=error.get("message", "unknown"),
+                message=error.message or "unknown",
                 status_code=e.response.status_code,
-                error_code=error.get("code"),
+                error_code=error.code,
             ) from e
 
     async def __aenter__(self) -> "KnoxClient":
@@ -3,16 +3,20 @@ from __future__ import annotations
 from math import e
 import os
 from collections.abc import AsyncIterator
-from typing import Any
+from typing import TYPE_CHECKING, Any
 from uuid import uuid4
 
-import boto3
 import pytest
 import pytest_asyncio
 
 from tests.client.knox import KnoxClient
 from tests.util.secret import get_secret
 
+if TYPE_CHECKING:
+    import aioboto3
+    import boto3
+    from aiobotocore.client import AioBaseClient
+
 
 @pytest.fixture(scope="session")
 def environment() -> str:
@@ -42,6 +46,8 @@ def test_organization_id(environment: str) -> str:
 
 @pytest.fixture(scope="session")
 def aws_session() -> boto3.Session:
+    import boto3
+
     return boto3.Session(
         aws_access_key_id=os.getenv("AWS_ACCESS_KEY_ID"),
         aws_secret_access_key=os.getenv("AWS_SECRET_ACCESS_KEY"),
@@ -51,7 +57,19 @@ def aws_session() -> boto3.Session:
 
 
 @pytest.fixture(scope="session")
-def knox_api_key(aws_session: boto3.Session, environment: str) -> str:
+def aws_async_session() -> aioboto3.Session:
+    import aioboto3
+
+    return aioboto3.Session(
+        aws_access_key_id=os.getenv("AWS_ACCESS_KEY_ID"),
+        aws_secret_access_key=os.getenv("AWS_SECRET_ACCESS_KEY"),
+        aws_session_token=os.getenv("AWS_SESSION_TOKEN"),
+        region_name=os.getenv("AWS_REGION"),
+    )
+
+
+@pytest.fixture(scope="session")
+def knox_api_key(request: pytest.FixtureRequest, environment: str) -> str:
     if environment == "local":
         return os.getenv("KNOX_API_KEY")
     
@@ -59,10 +77,12 @@ def knox_api_key(aws_session: boto3.Session, environment: str) -> str:
     if secret_name is None:
         raise ValueError("Knox API key secret name is not set")
 
+    # Only resolve the AWS session here so local runs never import boto3 for the Knox client.
+    aws_session: boto3.Session = request.getfixturevalue("aws_session")
     return get_secret(aws_session, secret_name)
 
 
-@pytest_asyncio.fixture(scope="function")
+@pytest_asyncio.fixture(scope="session", loop_scope="session")
 async def knox_client(knox_endpoint: str, knox_api_key: str) -> AsyncIterator[KnoxClient]:
     async with KnoxClient(base_url=knox_endpoint, api_key=knox_api_key) as client:
         yield client
@@ -73,24 +93,28 @@ def aws_endpoint(environment: str) -> str | None:
     return os.getenv("AWS_ENDPOINT") if environment == "local" else None
 
 
-@pytest.fixture(scope="session")
-def aws_sqs_client(aws_session: boto3.Session, aws_endpoint: str) -> boto3.client:
-    return aws_session.client("sqs", endpoint_url=aws_endpoint)
+@pytest_asyncio.fixture(scope="session", loop_scope="session")
+async def aws_sqs_client(aws_async_session: aioboto3.Session, aws_endpoint: str) -> AsyncIterator[AioBaseClient]:
+    async with aws_async_session.client("sqs", endpoint_url=aws_endpoint) as client:
+        yield client
 
 
 @pytest.fixture(scope="session")
-def knox_ingestion_queue_name() -> str:
-    return os.getenv("KNOX_INGESTION_QUEUE_NAME")
+def knox_ingestion_queue_name(environment: str) -> str:
+    queue_name = os.getenv("KNOX_INGESTION_QUEUE_NAME")
+    if queue_name:
+        return queue_name
+    return "local-stack-source-ntd-queue" if environment == "local" else "knox-ingestion-source-ntd-queue"
 
 
-@pytest.fixture(scope="session")
-def knox_ingestion_queue_url(aws_sqs_client: boto3.client, knox_ingestion_queue_name: str) -> str:    
+@pytest_asyncio.fixture(scope="session", loop_scope="session")
+async def knox_ingestion_queue_url(aws_sqs_client: AioBaseClient, knox_ingestion_queue_name: str) -> str:    
     queue_url = os.getenv("KNOX_INGESTION_QUEUE_URL")
     if queue_url:
         return queue_url
 
     try:
-        response = aws_sqs_client.get_queue_url(QueueName=knox_ingestion_queue_name)
+        response = await aws_sqs_client.get_queue_url(QueueName=knox_ingestion_queue_name)
         return response["QueueUrl"]
     except aws_sqs_client.exceptions.QueueDoesNotExist as exc:  # type: ignore[attr-defined]
         raise RuntimeError(
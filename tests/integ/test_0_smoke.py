@@ -1,48 +1,49 @@
 from __future__ import annotations
 
+import asyncio
 import os
+from typing import TYPE_CHECKING
 
-import boto3
 import httpx
 import pytest
 
 from tests.client.knox import KnoxClient
 
+if TYPE_CHECKING:
+    from aiobotocore.client import AioBaseClient
+
 
 pytestmark = [pytest.mark.smoke, pytest.mark.integration]
 
 
 @pytest.mark.asyncio
-async def test_knox_ingestion_queue_exists(aws_sqs_client: boto3.client, knox_ingestion_queue_name: str) -> None:
+async def test_knox_ingestion_queue_exists(aws_sqs_client: AioBaseClient, knox_ingestion_queue_name: str) -> None:
     """
     Basic smoke test to check that the Knox Ingestion queue exists
     """
-    assert aws_sqs_client.get_queue_url(QueueName=knox_ingestion_queue_name) is not None
+    assert await aws_sqs_client.get_queue_url(QueueName=knox_ingestion_queue_name) is not None
 
 
 @pytest.mark.asyncio
-async def test_knox_healthcheck(knox_client: KnoxClient) -> None:
-    """
-    Basic smoke test to check that the Knox service is healthy
-    """
-    assert await knox_client.health(), f"Knox health check failed"
-
-
-@pytest.mark.asyncio
-async def test_alchemy_healthcheck(alchemy_endpoint: str) -> None:
-    """
-    Basic smoke test to check that the Alchemy service is healthy
-    """
-    async with httpx.AsyncClient(base_url=alchemy_endpoint) as client:
-        response = await client.get("/v1/health")
-        assert response.status_code == 200, f"Alchemy health check failed"
-
-
-@pytest.mark.asyncio
-async def test_heimdall_healthcheck(heimdall_endpoint: str) -> None:
-    """
-    Basic smoke test to check that the Heimdall service is healthy
-    """
-    async with httpx.AsyncClient(base_url=heimdall_endpoint) as client:
-        response = await client.get("/api/v1/health")
-        assert response.status_code == 200, f"Heimdall health check failed"
\ No newline at end of file
+async def test_service_healthchecks(knox_client: KnoxClient, alchemy_endpoint: str, heimdall_endpoint: str) -> None:
+    """
+    Basic smoke test to check that the Knox, Alchemy and Heimdall services are healthy
+    """
+    async with httpx.AsyncClient() as client:
+        knox_result, alchemy_result, heimdall_result = await asyncio.gather(
+            knox_client.health(),
+            client.get(f"{alchemy_endpoint}/v1/health"),
+            client.get(f"{heimdall_endpoint}/api/v1/health"),
+            return_exceptions=True,
+        )
+
+    failures = [
+        f"{service} health check failed: {result!r}"
+        for service, result, healthy in (
+            ("Knox", knox_result, knox_result is True),
+            ("Alchemy", alchemy_result, isinstance(alchemy_result, httpx.Response) and alchemy_result.status_code == 200),
+            ("Heimdall", heimdall_result, isinstance(heimdall_result, httpx.Response) and heimdall_result.status_code == 200),
+        )
+        if not healthy
+    ]
+    assert not failures, "; ".join(failures)
\ No newline at end of file
@@ -1,27 +1,32 @@
 from __future__ import annotations
 
 import asyncio
-import json
 import os
+import secrets
 import time
-from copy import deepcopy
+from collections.abc import Mapping
 from dataclasses import dataclass
 from datetime import datetime, timezone
 from pathlib import Path
-from typing import Any
+from types import MappingProxyType
+from typing import TYPE_CHECKING, Any
 from uuid import uuid4
 
-import boto3
+import orjson
 import pytest
 from ulid import ULID
 
-from tests.client.knox import KnoxClient
+from tests.client.knox import KnoxClient, Transaction
+
+if TYPE_CHECKING:
+    from aiobotocore.client import AioBaseClient
 
 pytestmark = [pytest.mark.integration, pytest.mark.incremental]
 
 TOTAL_MESSAGES = 100
 SQS_BATCH_SIZE = 10
-POLL_INTERVAL_SECONDS = 2.0
+INITIAL_POLL_INTERVAL_SECONDS = 0.25
+MAX_POLL_INTERVAL_SECONDS = 4.0
 MAX_WAIT_SECONDS = 60
 
 
@@ -29,25 +34,18 @@ MAX_WAIT_SECONDS = 60
 class NTDV1BatchPlan:
     organization_id: str
     batch_id: str
-    messages: list[dict[str, Any]]
+    messages: list[str]
     transaction_ids: list[str]
     sent: bool = False
 
 
 @pytest.fixture(scope="session")
-def ntdv1_message_template() -> dict[str, Any]:
-    path = _resolve_template_path()
-    with path.open(encoding="utf-8") as handle:
-        return json.load(handle)
-
-
-@pytest.fixture(scope="session")
-def knox_ingestion_queue_url(environment: str, aws_sqs_client: boto3.client) -> str:
-    return _resolve_queue_url(environment, aws_sqs_client)
+def ntdv1_message_template() -> Mapping[str, Any]:
+    return _freeze(orjson.loads(_resolve_template_path().read_bytes()))
 
 
 @pytest.fixture(scope="module")
-def ntdv1_batch_plan(test_organization_id: str, ntdv1_message_template: dict[str, Any]) -> NTDV1BatchPlan:
+def ntdv1_batch_plan(test_organization_id: str, ntdv1_message_template: Mapping[str, Any]) -> NTDV1BatchPlan:
     batch_id = f"batch-{ULID()}"
     messages, transaction_ids = _build_batch(ntdv1_message_template, test_organization_id, batch_id, TOTAL_MESSAGES)
     return NTDV1BatchPlan(
@@ -59,7 +57,7 @@ def ntdv1_batch_plan(test_organization_id: str, ntdv1_message_template: dict[str
 
 
 @pytest.mark.asyncio
-async def test_publish_ntdv1_messages(aws_sqs_client: boto3.client, knox_ingestion_queue_url: str, ntdv1_batch_plan: NTDV1BatchPlan) -> None:
+async def test_publish_ntdv1_messages(aws_sqs_client: AioBaseClient, knox_ingestion_queue_url: str, ntdv1_batch_plan: NTDV1BatchPlan) -> None:
     await _enqueue_batch(aws_sqs_client, knox_ingestion_queue_url, ntdv1_batch_plan.messages)
     ntdv1_batch_plan.sent = True
 
@@ -72,30 +70,12 @@ async def test_knox_search_returns_published_transactions(
 
     transactions = await _wait_for_transactions(knox_client, ntdv1_batch_plan)
 
-    received_ids = {transaction["transaction_id"] for transaction in transactions}
+    received_ids = {transaction.transaction_id for transaction in transactions}
     missing_ids = set(ntdv1_batch_plan.transaction_ids) - received_ids
 
     assert not missing_ids, f"Missing transactions: {sorted(missing_ids)}"
 
 
-def _resolve_queue_url(environment: str, aws_sqs_client: boto3.client) -> str:
-    queue_url = os.getenv("KNOX_INGESTION_QUEUE_URL")
-    if queue_url:
-        return queue_url
-
-    queue_name = os.getenv("KNOX_INGESTION_QUEUE_NAME")
-    if not queue_name:
-        queue_name = "local-stack-source-ntd-queue" if environment == "local" else "knox-ingestion-source-ntd-queue"
-
-    try:
-        response = aws_sqs_client.get_queue_url(QueueName=queue_name)
-        return response["QueueUrl"]
-    except aws_sqs_client.exceptions.QueueDoesNotExist as exc:  # type: ignore[attr-defined]
-        raise RuntimeError(
-            f"Unable to locate SQS queue {queue_name!r}. Set KNOX_INGESTION_QUEUE_URL or KNOX_INGESTION_QUEUE_NAME."
-        ) from exc
-
-
 def _resolve_template_path() -> Path:
     override_path = os.getenv("NTDV1_TEMPLATE_PATH")
     if override_path:
@@ -112,73 +92,122 @@ def _resolve_template_path() -> Path:
     raise FileNotFoundError(f"Unable to locate default NTDV1 template at {candidate}")
 
 
+def _freeze(value: Any) -> Any:
+    """Recursively wrap dicts in read-only proxies and lists in tuples so the shared template cannot be mutated."""
+    if isinstance(value, dict):
+        return MappingProxyType({key: _freeze(item) for key, item in value.items()})
+    if isinstance(value, list):
+        return tuple(_freeze(item) for item in value)
+    return value
+
+
 def _build_batch(
-    template: dict[str, Any], organization_id: str, batch_id: str, count: int
-) -> tuple[list[dict[str, Any]], list[str]]:
-    messages: list[dict[str, Any]] = []
-    transaction_ids: list[str] = []
-    base_order_number = template["transaction_data"]["metadata"].get("order_number", "ORDER")
-    base_customer_id = template["transaction_data"]["metadata"].get("customer_id", "CUSTOMER")
-
-    for index in range(count):
-        message = deepcopy(template)
-        record_suffix = str(ULID())
-        message["id"] = f"{organization_id}|{record_suffix}"
-        transaction_ids.append(record_suffix)
-
-        transaction_data = message["transaction_data"]
-        transaction_data["transaction_date"] = _format_timestamp()
-
-        metadata = transaction_data["metadata"]
-        metadata["organization_id"] = organization_id
-        metadata["batch_id"] = batch_id
-        metadata["batch_date"] = _format_timestamp()
-        metadata["order_number"] = f"{base_order_number}-{index:04d}"
-        metadata["customer_id"] = f"{base_customer_id}-{index:04d}"
-        metadata["meta_integration_id"] = f"integration-{organization_id}"
-
-        for line_index, line_item in enumerate(message.get("line_item_data", [])):
-            item_metadata = line_item.setdefault("metadata", {})
-            item_metadata["line_id"] = f"{record_suffix}-line-{line_index}"
-
-        messages.append(message)
+    template: Mapping[str, Any], organization_id: str, batch_id: str, count: int
+) -> tuple[list[str], list[str]]:
+    transaction_ids = _generate_ulids(count)
+    message_format = _build_message_format(template, organization_id, batch_id, _format_timestamp())
+    messages = [
+        message_format.format(record_suffix=record_suffix, index=f"{index:04d}")
+        for index, record_suffix in enumerate(transaction_ids)
+    ]
+    if messages:
+        # Fail fast if the formatted pattern stops producing valid JSON or leaves a placeholder unsubstituted.
+        first_message = orjson.loads(messages[0])
+        assert first_message["id"] == f"{organization_id}|{transaction_ids[0]}", first_message["id"]
+        order_number = first_message["transaction_data"]["metadata"]["order_number"]
+        assert order_number.endswith("-0000"), order_number
 
     return messages, transaction_ids
 
 
+def _build_message_format(template: Mapping[str, Any], organization_id: str, batch_id: str, timestamp: str) -> str:
+    """Encode the template once as a str.format pattern with per-message {record_suffix} and {index} fields."""
+    markers = {name: orjson.dumps(_placeholder(name)).decode()[1:-1] for name in ("record_suffix", "index")}
+    template_json = orjson.dumps(template, default=dict).decode()
+    if any(marker in template_json for marker in markers.values()):
+        raise ValueError("NTDV1 template contains a reserved NUL-delimited placeholder")
+
+    record_suffix = _placeholder("record_suffix")
+    index = _placeholder("index")
+    template_transaction_data = template["transaction_data"]
+    template_metadata = template_transaction_data["metadata"]
+    template_line_items = template.get("line_item_data")
+    base_order_number = template_metadata.get("order_number", "ORDER")
+    base_customer_id = template_metadata.get("customer_id", "CUSTOMER")
+
+    metadata = {
+        **template_metadata,
+        "organization_id": organization_id,
+        "batch_id": batch_id,
+        "batch_date": timestamp,
+        "order_number": f"{base_order_number}-{index}",
+        "customer_id": f"{base_customer_id}-{index}",
+        "meta_integration_id": f"integration-{organization_id}",
+    }
+    message = {
+        **template,
+        "id": f"{organization_id}|{record_suffix}",
+        "transaction_data": {
+            **template_transaction_data,
+            "transaction_date": timestamp,
+            "metadata": metadata,
+        },
+    }
+    if template_line_items is not None:
+        message["line_item_data"] = [
+            {**line_item, "metadata": {**line_item.get("metadata", {}), "line_id": f"{record_suffix}-line-{line_index}"}}
+            for line_index, line_item in enumerate(template_line_items)
+        ]
+
+    # default=dict lets orjson encode the read-only template proxies that are not rebuilt above.
+    encoded = orjson.dumps(message, default=dict).decode().replace("{", "{{").replace("}", "}}")
+    for name, marker in markers.items():
+        encoded = encoded.replace(marker, f"{{{name}}}")
+    return encoded
+
+
+def _placeholder(name: str) -> str:
+    # NUL-delimited names are assumed not to occur in the template; _build_message_format rejects one that has them.
+    return f"\x00{name}\x00"
+
+
+def _generate_ulids(count: int) -> list[str]:
+    # Share one timestamp and draw all of the randomness in a single call rather than once per ULID.
+    timestamp = int(time.time() * 1000).to_bytes(6, "big")
+    randomness = secrets.token_bytes(10 * count)
+    return [str(ULID(timestamp + randomness[offset : offset + 10])) for offset in range(0, 10 * count, 10)]
+
+
 def _format_timestamp(value: datetime | None = None) -> str:
     timestamp = (value or datetime.now(timezone.utc)).replace(microsecond=0)
     return timestamp.isoformat().replace("+00:00", "Z")
 
 
-async def _enqueue_batch(aws_sqs_client: boto3.client, queue_url: str, messages: list[dict[str, Any]]) -> None:
-    try:
-        for chunk_start in range(0, len(messages), SQS_BATCH_SIZE):
-            chunk = messages[chunk_start : chunk_start + SQS_BATCH_SIZE]
-            entries = [
-                {
-                    "Id": f"{chunk_start + offset}",
-                    "MessageBody": json.dumps(message),
-                }
-                for offset, message in enumerate(chunk)
-            ]
-            response = await asyncio.to_thread(
-                aws_sqs_client.send_message_batch,
-                QueueUrl=queue_url,
-                Entries=entries,
-            )
-            failed = response.get("Failed", [])
-            if failed:
-                failures = ", ".join(f"{entry.get('Id')}: {entry.get('Message')}" for entry in failed)
-                raise AssertionError(f"Failed to enqueue {len(failed)} messages: {failures}")
-    finally:
-        aws_sqs_client.close()
-
-
-async def _wait_for_transactions(knox_client: KnoxClient, batch: NTDV1BatchPlan) -> list[dict[str, Any]]:
+async def _enqueue_batch(aws_sqs_client: AioBaseClient, queue_url: str, messages: list[str]) -> None:
+    batches = [
+        [
+            {
+                "Id": f"{chunk_start + offset}",
+                "MessageBody": message,
+            }
+            for offset, message in enumerate(messages[chunk_start : chunk_start + SQS_BATCH_SIZE])
+        ]
+        for chunk_start in range(0, len(messages), SQS_BATCH_SIZE)
+    ]
+    responses = await asyncio.gather(
+        *(aws_sqs_client.send_message_batch(QueueUrl=queue_url, Entries=entries) for entries in batches)
+    )
+
+    failed = [entry for response in responses for entry in response.get("Failed", [])]
+    if failed:
+        failures = ", ".join(f"{entry.get('Id')}: {entry.get('Message')}" for entry in failed)
+        raise AssertionError(f"Failed to enqueue {len(failed)} messages: {failures}")
+
+
+async def _wait_for_transactions(knox_client: KnoxClient, batch: NTDV1BatchPlan) -> list[Transaction]:
     deadline = time.monotonic() + MAX_WAIT_SECONDS
     expected_count = len(batch.transaction_ids)
-    expected_ids = set(batch.transaction_ids)
+    missing_ids = set(batch.transaction_ids)
     filter_payload = {
         "filters": {
             "transaction_metadata_organization_id": {"data": [batch.organization_id], "operator": "eq"},
@@ -186,21 +215,25 @@ async def _wait_for_transactions(knox_client: KnoxClient, batch: NTDV1BatchPlan)
         },
         "pagination": {"limit": expected_count},
     }
-    last_observed = 0
+    body = orjson.dumps(filter_payload)
+    received: dict[str, Transaction] = {}
+    poll_interval = INITIAL_POLL_INTERVAL_SECONDS
 
     while time.monotonic() < deadline:
-        response = await knox_client.search_transactions(filter_payload)
-        transactions = response.get("data", []) or []
-        last_observed = len(transactions)
+        response = await knox_client.search_transactions_raw(body)
+        for transaction in response.data or []:
+            if transaction.transaction_id in missing_ids:
+                missing_ids.discard(transaction.transaction_id)
+                received[transaction.transaction_id] = transaction
 
-        received_ids = {transaction["transaction_id"] for transaction in transactions}
-        if received_ids.issuperset(expected_ids):
-            return transactions
+        if not missing_ids:
+            return list(received.values())
 
-        await asyncio.sleep(POLL_INTERVAL_SECONDS)
+        await asyncio.sleep(min(poll_interval, max(deadline - time.monotonic(), 0)))
+        poll_interval = min(poll_interval * 2, MAX_POLL_INTERVAL_SECONDS)
 
     raise AssertionError(
         f"Expected {expected_count} transactions for batch {batch.batch_id} "
-        f"but only observed {last_observed} within {MAX_WAIT_SECONDS} seconds."
+        f"but only observed {len(received)} within {MAX_WAIT_SECONDS} seconds."
     )
 
@@ -1,14 +1,23 @@
-import boto3
+from __future__ import annotations
 
+from typing import TYPE_CHECKING
 
-_api_key = None
+if TYPE_CHECKING:
+    import boto3
+
+
+_secrets: dict[str, str] = {}
 
 
 def get_secret(aws_session: boto3.Session, secret_name: str) -> str:
+    if secret_name in _secrets:
+        return _secrets[secret_name]
+
     client = aws_session.client(  # type: ignore[reportUnknownMemberType]
         service_name="secretsmanager",
     )
 
     get_secret_value_response = client.get_secret_value(SecretId=secret_name)
 
-    return get_secret_value_response["SecretString"]
\ No newline at end of file
+    _secrets[secret_name] = get_secret_value_response["SecretString"]
+    return _secrets[secret_name]
\ No newline at end of file